@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Add numeric shadow columns for the free-text price/capacity/beds/entrance fee
+fields, create their indexes and backfill them from the existing text.
+  room.price_value, room.capacity_value, room.beds_value
+  cottage.price_value, cottage.capacity_value, cottage.beds_value
+  owner.entrance_fee_value
+Safe to re-run; existing columns and indexes are left alone and values are recomputed.
+Usage: python scripts/add_numeric_shadow_columns.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, Room, Cottage, Owner, parse_number, parse_count, rebuild_resort_summaries
+from sqlalchemy import text, inspect
+
+COLUMNS = {
+    'room': [('price_value', 'FLOAT', True), ('capacity_value', 'INTEGER', True), ('beds_value', 'INTEGER', False)],
+    'cottage': [('price_value', 'FLOAT', True), ('capacity_value', 'INTEGER', True), ('beds_value', 'INTEGER', False)],
+    'owner': [('entrance_fee_value', 'FLOAT', True)],
+}
+
+
+def add_columns():
+    existing = {table: {c['name'] for c in inspect(db.engine).get_columns(table)} for table in COLUMNS}
+    for table, columns in COLUMNS.items():
+        for name, col_type, indexed in columns:
+            if name not in existing[table]:
+                print(f"Adding {table}.{name}...")
+                db.session.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {col_type}"))
+            else:
+                print(f"✓ {table}.{name} already exists")
+            if indexed:
+                db.session.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_{name} ON {table} ({name})"))
+    db.session.commit()
+
+
+def backfill():
+    for Model in (Room, Cottage):
+        count = 0
+        for row in Model.query.yield_per(500):
+            row.price_value = parse_number(row.price)
+            row.capacity_value = parse_count(row.capacity)
+            row.beds_value = parse_count(row.beds)
+            count += 1
+        db.session.commit()
+        print(f"✓ Backfilled {count} {Model.__tablename__} row(s)")
+    count = 0
+    for owner in Owner.query.yield_per(500):
+        owner.entrance_fee_value = parse_number(owner.entrance_fee)
+        count += 1
+    db.session.commit()
+    print(f"✓ Backfilled {count} owner row(s)")
+
+
+def migrate():
+    with app.app_context():
+        try:
+            add_columns()
+            backfill()
+            # cheapest prices in the resort summary come from price_value
+            rebuild_resort_summaries()
+            print("✓ Resort summaries refreshed")
+        except Exception as e:
+            print(f"Error: {e}")
+            db.session.rollback()
+
+
+if __name__ == '__main__':
+    migrate()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Create the secondary indexes declared on the Reservation model for existing
+databases (new databases get them from db.create_all()):
+  ix_reservation_owner_status_check_in   (owner_id, status, check_in)
+  ix_reservation_user_created_at         (user_id, created_at)
+  ix_reservation_owner_created_at        (owner_id, created_at)
+  ix_reservation_status_expires_at       (status, expires_at)
+On PostgreSQL the indexes are built with CREATE INDEX CONCURRENTLY so the
+table stays writable; an invalid index left by an interrupted concurrent
+build is dropped and rebuilt.
+Safe to re-run; existing valid indexes are left alone.
+Usage: python scripts/add_reservation_indexes.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, Reservation
+from sqlalchemy import text
+
+
+def _invalid_postgres_index(conn, name):
+    return conn.execute(text(
+        "SELECT NOT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+    ), {'name': name}).scalar()
+
+
+def create_indexes():
+    postgres = db.engine.dialect.name == 'postgresql'
+    # CONCURRENTLY cannot run inside a transaction block
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        for index in sorted(Reservation.__table__.indexes, key=lambda i: i.name):
+            columns = ', '.join(column.name for column in index.columns)
+            if postgres:
+                if _invalid_postgres_index(conn, index.name):
+                    print(f"Dropping invalid {index.name} left by an interrupted build...")
+                    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}"))
+                conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index.name} ON reservation ({columns})"))
+            else:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index.name} ON reservation ({columns})"))
+            print(f"✓ {index.name} ({columns})")
+        # refresh planner statistics for the new indexes
+        conn.execute(text("ANALYZE reservation"))
+
+
+def migrate():
+    with app.app_context():
+        try:
+            create_indexes()
+        except Exception as e:
+            print(f"Error: {e}")
+
+
+if __name__ == '__main__':
+    migrate()
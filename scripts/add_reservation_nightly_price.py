@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Add reservation.nightly_price, the room/cottage price a reservation was
+confirmed at, which the analytics rollup prices revenue with.
+Confirmed reservations made before the column existed are backfilled with
+their resource's current price_value (the booked price was never stored),
+then the rollup is rebuilt in full.
+Safe to re-run; the column is left alone and only unpriced rows are filled.
+Usage: python scripts/add_reservation_nightly_price.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, Reservation, record_nightly_prices, refresh_analytics
+from sqlalchemy import text, inspect
+
+BATCH = 500
+
+
+def add_column():
+    columns = {c['name'] for c in inspect(db.engine).get_columns('reservation')}
+    if 'nightly_price' not in columns:
+        print("Adding reservation.nightly_price...")
+        db.session.execute(text("ALTER TABLE reservation ADD COLUMN nightly_price FLOAT"))
+        db.session.commit()
+    else:
+        print("✓ reservation.nightly_price already exists")
+
+
+def backfill():
+    ids = [reservation_id for (reservation_id,) in db.session.query(Reservation.id).filter(
+        Reservation.status == 'confirmed', Reservation.nightly_price == None
+    )]
+    for start in range(0, len(ids), BATCH):
+        record_nightly_prices(ids[start:start + BATCH])
+        db.session.commit()
+    print(f"✓ Priced {len(ids)} confirmed reservation(s) at the current price")
+
+
+def migrate():
+    with app.app_context():
+        try:
+            add_column()
+            backfill()
+            count = refresh_analytics(full=True)
+            print(f"✓ Analytics rollup rebuilt ({count} resource day(s))")
+        except Exception as e:
+            print(f"Error: {e}")
+            db.session.rollback()
+
+
+if __name__ == '__main__':
+    migrate()
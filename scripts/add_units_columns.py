@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Add the 'units' column to the room and cottage tables (how many identical
+units a listing stands for, default 1) and rebuild the resource_occupancy
+availability index with its new per-unit primary key
+(resource_type, resource_id, day, unit).
+The index is derived data: it is dropped, recreated and refilled from
+confirmed reservations, then the analytics rollup is refreshed in full.
+Safe to re-run; existing units columns are left alone.
+Usage: python scripts/add_units_columns.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, ResourceOccupancy, rebuild_occupancy_index, refresh_analytics
+from sqlalchemy import text, inspect
+
+TABLES = ['room', 'cottage']
+
+
+def add_columns():
+    for table in TABLES:
+        columns = {c['name'] for c in inspect(db.engine).get_columns(table)}
+        if 'units' in columns:
+            print(f"✓ {table}.units already exists")
+            continue
+        print(f"Adding {table}.units...")
+        db.session.execute(text(f"ALTER TABLE {table} ADD COLUMN units INTEGER NOT NULL DEFAULT 1"))
+    db.session.commit()
+
+
+def recreate_occupancy_index():
+    columns = {c['name'] for c in inspect(db.engine).get_columns('resource_occupancy')}
+    if 'unit' not in columns:
+        print("Recreating resource_occupancy with a unit column...")
+        ResourceOccupancy.__table__.drop(db.engine)
+        ResourceOccupancy.__table__.create(db.engine)
+    count, days, conflicts = rebuild_occupancy_index()
+    print(f"✓ Indexed {days} day(s) from {count} confirmed reservation(s)")
+    if conflicts:
+        print(f"! Skipped {conflicts} day(s) with every unit already held by another confirmed reservation")
+
+
+def migrate():
+    with app.app_context():
+        try:
+            add_columns()
+            recreate_occupancy_index()
+            rows = refresh_analytics(full=True)
+            print(f"✓ Rolled up {rows} resource day(s) for analytics")
+        except Exception as e:
+            print(f"Error: {e}")
+            db.session.rollback()
+
+
+if __name__ == '__main__':
+    migrate()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Add updated_at columns to owner, room, cottage, food and activity.
+They feed the ETag / Last-Modified validators of the public resort pages.
+Existing offers are backfilled from created_at and owners from the current time.
+Usage: python scripts/add_updated_at_columns.py
+"""
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from sqlalchemy import text, inspect
+
+TABLES = ['owner', 'room', 'cottage', 'food', 'activity']
+
+
+def add_updated_at_columns():
+    with app.app_context():
+        try:
+            col_type = 'TIMESTAMP' if db.engine.dialect.name == 'postgresql' else 'DATETIME'
+            for table in TABLES:
+                columns = [c['name'] for c in inspect(db.engine).get_columns(table)]
+                if 'updated_at' in columns:
+                    print(f"✓ {table}.updated_at already exists")
+                    continue
+                print(f"Adding updated_at column to {table} table...")
+                db.session.execute(text(f"ALTER TABLE {table} ADD COLUMN updated_at {col_type}"))
+                if table == 'owner':
+                    db.session.execute(text("UPDATE owner SET updated_at = :now"), {'now': datetime.utcnow()})
+                else:
+                    db.session.execute(text(f"UPDATE {table} SET updated_at = COALESCE(created_at, :now)"), {'now': datetime.utcnow()})
+                db.session.commit()
+                print(f"✓ {table}.updated_at added and backfilled")
+        except Exception as e:
+            print(f"Error: {e}")
+            db.session.rollback()
+
+
+if __name__ == '__main__':
+    add_updated_at_columns()
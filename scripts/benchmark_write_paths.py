@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Count the SQL statements and commits behind the main write endpoints.
+
+Runs user signup, owner signup, /api/reserve, /api/reserve/cart and offer
+approval through the Flask test client against a scratch database and prints,
+per route, the statements and commits per request and the median time. Each
+of these handlers should commit exactly once (see unit_of_work in app.py).
+
+Never touches DATABASE_URL: it uses a temporary SQLite database, or the empty
+database in BENCHMARK_DATABASE_URL (which must be a throwaway one).
+Usage: python scripts/benchmark_write_paths.py [requests per route]
+"""
+import os
+import sys
+import time
+import tempfile
+import statistics
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEMP_DB = None
+if os.environ.get('BENCHMARK_DATABASE_URL'):
+    os.environ['DATABASE_URL'] = os.environ['BENCHMARK_DATABASE_URL']
+else:
+    TEMP_DB = os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + TEMP_DB
+os.environ['PAGE_CACHE_BACKEND'] = 'none'
+
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+from app import app, db, Owner, User, Admin, Room, Cottage
+
+counts = {'statements': 0, 'commits': 0}
+
+
+def _statement(*args):
+    counts['statements'] += 1
+
+
+def _commit(*args):
+    counts['commits'] += 1
+
+
+def create_fixture(n):
+    owner = Owner(username='bench_owner', password=generate_password_hash('bench'),
+                  name='Bench Owner', resort_name='Bench Resort')
+    user = User(username='bench_user', password=generate_password_hash('bench'), name='Bench User')
+    admin = Admin(username='bench_admin', password=generate_password_hash('bench'))
+    db.session.add_all([owner, user, admin])
+    db.session.flush()
+    room = Room(owner_id=owner.id, name='Bench Room', price='1000', capacity='2', status='approved')
+    cottage = Cottage(owner_id=owner.id, name='Bench Cottage', price='500', capacity='4', status='approved')
+    pending = [Room(owner_id=owner.id, name=f'Pending Room {i}', price='900', capacity='2', status='pending')
+               for i in range(n)]
+    db.session.add_all([room, cottage] + pending)
+    db.session.commit()
+    return owner.id, user.id, admin.id, room.id, cottage.id, [r.id for r in pending]
+
+
+def stay(i, resource_type, resource_id, owner_id):
+    check_in = date.today() + timedelta(days=30 + 3 * i)
+    # ids as strings, the way the resort pages send them
+    return {'resource_type': resource_type, 'resource_id': str(resource_id), 'owner_id': str(owner_id),
+            'check_in': check_in.isoformat(), 'check_out': (check_in + timedelta(days=1)).isoformat(),
+            'guests': '2'}
+
+
+def measure(client, send, n):
+    timings = []
+    statements = commits = 0
+    for i in range(n):
+        counts['statements'] = counts['commits'] = 0
+        started = time.perf_counter()
+        resp = send(client, i)
+        timings.append((time.perf_counter() - started) * 1000)
+        if resp.status_code >= 400:
+            raise SystemExit(f"request failed with {resp.status_code}: {resp.get_data(as_text=True)[:200]}")
+        statements += counts['statements']
+        commits += counts['commits']
+    return statements / n, commits / n, statistics.median(timings)
+
+
+def benchmark(n=50):
+    with app.app_context():
+        owner_id, user_id, admin_id, room_id, cottage_id, pending_ids = create_fixture(n)
+        event.listen(db.engine, 'before_cursor_execute', _statement)
+        event.listen(db.engine, 'commit', _commit)
+
+    anonymous = app.test_client()
+    customer = app.test_client()
+    with customer.session_transaction() as sess:
+        sess['user_id'] = user_id
+    admin = app.test_client()
+    with admin.session_transaction() as sess:
+        sess['admin_id'] = admin_id
+
+    routes = [
+        ('user signup', anonymous, lambda c, i: c.post('/userSignUp', data={
+            'username': f'bench_signup_user_{i}', 'password': 'pw', 'confirm_password': 'pw', 'name': f'User {i}'})),
+        ('owner signup', anonymous, lambda c, i: c.post('/ownerSignUp', data={
+            'username': f'bench_signup_owner_{i}', 'password': 'pw', 'confirm_password': 'pw',
+            'name': f'Owner {i}', 'resort_name': f'Resort {i}'})),
+        ('reserve', customer, lambda c, i: c.post('/api/reserve', json=stay(i, 'room', room_id, owner_id))),
+        ('reserve cart (2 items)', customer, lambda c, i: c.post('/api/reserve/cart', json={'items': [
+            stay(i, 'room', room_id, owner_id), stay(i, 'cottage', cottage_id, owner_id)]})),
+        ('approve offer', admin, lambda c, i: c.post('/admin/approve-offer', json={
+            'type': 'room', 'id': pending_ids[i], 'action': 'approve'})),
+    ]
+    print(f"{'route':<26}{'statements':>12}{'commits':>10}{'median':>12}")
+    for name, client, send in routes:
+        statements, commits, median = measure(client, send, n)
+        print(f"{name:<26}{statements:>12.1f}{commits:>10.1f}{median:>9.2f} ms")
+    if TEMP_DB:
+        os.remove(TEMP_DB)
+
+
+if __name__ == '__main__':
+    benchmark(*[int(a) for a in sys.argv[1:2]])
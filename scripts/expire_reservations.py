@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Expire pending reservations that passed their 24 hour confirmation window and
+notify the customers, then purge expired idempotency keys. The app only runs
+the same sweep in a background thread (every EXPIRY_SWEEP_INTERVAL seconds) in
+a process started with BACKGROUND_JOBS=1 or as `python app.py`; behind
+gunicorn, schedule this script instead (e.g. every minute from cron) so the
+sweep runs in one place.
+Usage: python scripts/expire_reservations.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, expire_pending_reservations, idempotency_store
+
+
+def expire():
+    with app.app_context():
+        try:
+            count = expire_pending_reservations()
+            print(f"✓ Expired {count} pending reservation(s)")
+            idempotency_store.purge()
+        except Exception as e:
+            print(f"Error: {e}")
+            db.session.rollback()
+
+
+if __name__ == '__main__':
+    expire()
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Backfill the resource_occupancy availability index from confirmed reservations.
+Safe to re-run at any time; the index is recomputed from scratch, and the
+owner analytics rollup built from it is refreshed in full afterwards.
+Usage: python scripts/rebuild_occupancy_index.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, rebuild_occupancy_index, refresh_analytics
+
+
+def rebuild():
+    with app.app_context():
+        count, days, conflicts = rebuild_occupancy_index()
+        print(f"✓ Indexed {days} day(s) from {count} confirmed reservation(s)")
+        if conflicts:
+            print(f"! Skipped {conflicts} day(s) already held by another confirmed reservation")
+            print("  Run scripts/verify_occupancy_index.py to list them")
+        rows = refresh_analytics(full=True)
+        print(f"✓ Rolled up {rows} resource day(s) for analytics")
+
+
+if __name__ == '__main__':
+    rebuild()
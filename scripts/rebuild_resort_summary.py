@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Backfill the resort_summary table from the current offers of every owner.
+Safe to re-run at any time; each owner's row is recomputed from scratch.
+Usage: python scripts/rebuild_resort_summary.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, rebuild_resort_summaries
+
+
+def rebuild():
+    with app.app_context():
+        count = rebuild_resort_summaries()
+        print(f"✓ Rebuilt resort summary for {count} owner(s)")
+
+
+if __name__ == '__main__':
+    rebuild()
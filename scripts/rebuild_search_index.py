@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Create (if needed) and fully rebuild the resort full-text search index.
+Uses FTS5 on SQLite and a tsvector/GIN index on PostgreSQL.
+Usage: python scripts/rebuild_search_index.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, rebuild_search_index
+
+
+def rebuild():
+    with app.app_context():
+        count = rebuild_search_index()
+        print(f"✓ Indexed {count} resort(s) for search")
+
+
+if __name__ == '__main__':
+    rebuild()
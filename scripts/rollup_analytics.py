@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Refresh the owner analytics rollup (resource_daily_stats) from the
+availability index. Only the owner-months changed since the last run are
+rolled up again; pass "full" to rebuild the whole rollup, e.g. after
+scripts/rebuild_occupancy_index.py or a correction of booked prices.
+
+The app only runs the incremental refresh in a background thread (every
+ANALYTICS_ROLLUP_INTERVAL seconds) in a process started with
+BACKGROUND_JOBS=1 or as `python app.py`; behind gunicorn, schedule this
+script nightly from cron instead so the rollup runs in one place.
+Usage: python scripts/rollup_analytics.py [full]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, refresh_analytics
+
+
+def rollup(full=False):
+    with app.app_context():
+        try:
+            count = refresh_analytics(full=full)
+            print(f"✓ Rolled up {count} resource day(s){' (full rebuild)' if full else ''}")
+        except Exception as e:
+            print(f"Error: {e}")
+            db.session.rollback()
+
+
+if __name__ == '__main__':
+    rollup(full=sys.argv[1:2] == ['full'])
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Stress test for concurrent reservation confirmation.
+
+Creates a throwaway owner, room and customer, files many overlapping pending
+reservations for the room, then has several processes hit the owner
+confirm/cancel endpoint for them in random order at the same time. Every
+reservation is confirmed by more than one process, like double-clicks and
+duplicate tabs, and some are cancelled in between, like a guest cancelling
+while the owner confirms. Afterwards it checks that no two confirmed
+reservations overlap, that no reservation whose cancellation succeeded ended
+up confirmed, and that the availability index matches the confirmed
+reservations, then removes the fixture.
+
+Never touches DATABASE_URL: it uses a temporary SQLite database, or the
+database in STRESS_DATABASE_URL (which must be a throwaway one).
+Usage: python scripts/stress_confirm_reservations.py [processes] [reservations]
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+import multiprocessing
+from collections import Counter
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEMP_DB = None
+if os.environ.get('STRESS_DATABASE_URL'):
+    os.environ['DATABASE_URL'] = os.environ['STRESS_DATABASE_URL']
+else:
+    TEMP_DB = os.path.join(tempfile.mkdtemp(), 'stress.db')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + TEMP_DB
+
+from werkzeug.security import generate_password_hash
+from sqlalchemy.orm import aliased
+
+from app import (app, db, Owner, User, Room, Reservation, ResourceOccupancy,
+                 Notification, verify_occupancy_index)
+
+CANCEL_RATE = 0.1
+
+
+def create_fixture(count):
+    suffix = os.urandom(4).hex()
+    owner = Owner(username=f'stress_owner_{suffix}', password=generate_password_hash('stress'),
+                  name='Stress Owner', resort_name='Stress Resort')
+    user = User(username=f'stress_user_{suffix}', password=generate_password_hash('stress'), name='Stress User')
+    db.session.add_all([owner, user])
+    db.session.flush()
+    room = Room(owner_id=owner.id, name='Stress Room', price='1000', capacity='2', status='approved')
+    db.session.add(room)
+    db.session.flush()
+
+    # short stays packed into a one-month window far in the future, so most overlap
+    rng = random.Random(suffix)
+    start = datetime.utcnow().date() + timedelta(days=400)
+    now = datetime.utcnow()
+    reservations = []
+    for _ in range(count):
+        check_in = start + timedelta(days=rng.randrange(30))
+        reservations.append(Reservation(
+            user_id=user.id,
+            owner_id=owner.id,
+            resource_type='room',
+            resource_id=room.id,
+            check_in=check_in,
+            check_out=check_in + timedelta(days=rng.randint(1, 4)),
+            guests='2',
+            status='pending',
+            created_at=now,
+            expires_at=now + timedelta(hours=24)
+        ))
+    db.session.add_all(reservations)
+    db.session.commit()
+    return owner.id, user.id, room.id, [r.id for r in reservations]
+
+
+def worker(owner_id, reservation_ids, seed, results):
+    with app.app_context():
+        # never reuse connections inherited from the parent process
+        db.engine.dispose(close=False)
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['owner_id'] = owner_id
+    rng = random.Random(seed)
+    ids = list(reservation_ids)
+    rng.shuffle(ids)
+    counts = Counter()
+    cancelled = []
+    for reservation_id in ids:
+        action = 'cancel' if rng.random() < CANCEL_RATE else 'confirm'
+        resp = client.post(f'/api/owner/reservations/{reservation_id}/action', json={'action': action})
+        counts[f'{action} {resp.status_code}'] += 1
+        if action == 'cancel' and resp.status_code == 200:
+            cancelled.append(reservation_id)
+    results.put((dict(counts), cancelled))
+
+
+def find_double_bookings(owner_id):
+    a = aliased(Reservation)
+    b = aliased(Reservation)
+    return db.session.query(a.id, b.id).join(b, db.and_(
+        a.resource_type == b.resource_type,
+        a.resource_id == b.resource_id,
+        a.id < b.id,
+        a.check_in <= b.check_out,
+        a.check_out >= b.check_in
+    )).filter(
+        a.owner_id == owner_id,
+        a.status == 'confirmed',
+        b.status == 'confirmed'
+    ).all()
+
+
+def remove_fixture(owner_id, user_id, room_id, reservation_ids):
+    Notification.query.filter(Notification.related_reservation_id.in_(reservation_ids)).delete(synchronize_session=False)
+    ResourceOccupancy.query.filter_by(owner_id=owner_id).delete()
+    Reservation.query.filter(Reservation.id.in_(reservation_ids)).delete(synchronize_session=False)
+    Room.query.filter_by(id=room_id).delete()
+    User.query.filter_by(id=user_id).delete()
+    Owner.query.filter_by(id=owner_id).delete()
+    db.session.commit()
+
+
+def stress(processes=8, count=200):
+    with app.app_context():
+        owner_id, user_id, room_id, reservation_ids = create_fixture(count)
+        db.engine.dispose()
+    print(f"Stress test: {processes} processes, {count} overlapping reservations on one room")
+
+    results = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(target=worker, args=(owner_id, reservation_ids, seed, results))
+        for seed in range(processes)
+    ]
+    started = time.time()
+    for p in procs:
+        p.start()
+    totals = Counter()
+    cancelled = set()
+    for _ in procs:
+        counts, ids = results.get()
+        totals.update(counts)
+        cancelled.update(ids)
+    for p in procs:
+        p.join()
+    elapsed = time.time() - started
+    requests = sum(totals.values())
+    print(f"  {requests} requests in {elapsed:.1f}s ({requests / elapsed:.0f} req/s)")
+    for outcome, n in sorted(totals.items()):
+        print(f"  {outcome}: {n}")
+
+    with app.app_context():
+        try:
+            confirmed = Reservation.query.filter(
+                Reservation.id.in_(reservation_ids), Reservation.status == 'confirmed'
+            ).count()
+            doubles = find_double_bookings(owner_id)
+            revived = [rid for (rid,) in db.session.query(Reservation.id).filter(
+                Reservation.id.in_(cancelled), Reservation.status == 'confirmed'
+            )] if cancelled else []
+            missing, stale, conflicts = verify_occupancy_index()
+            print(f"  confirmed reservations: {confirmed}")
+            ok = not doubles and not revived and not missing and not stale and not conflicts
+            if doubles:
+                print(f"✗ {len(doubles)} overlapping confirmed pair(s), e.g. {doubles[:5]}")
+            if revived:
+                print(f"✗ {len(revived)} cancelled reservation(s) confirmed afterwards, e.g. {revived[:5]}")
+            if missing or stale or conflicts:
+                print(f"✗ Availability index out of sync: {len(missing)} missing, "
+                      f"{len(stale)} stale, {len(conflicts)} double-booked day(s)")
+            if ok:
+                print("✓ No double-bookings or revived cancellations; availability index consistent")
+        finally:
+            remove_fixture(owner_id, user_id, room_id, reservation_ids)
+    if TEMP_DB:
+        os.remove(TEMP_DB)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:3]]
+    sys.exit(stress(*args))
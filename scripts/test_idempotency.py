@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Test script for Idempotency-Key handling on retried POSTs (see idempotent).
+
+Checks that a retry replays the stored response without creating a second
+reservation, that reusing a key for a different body gets 422, that a retry
+while the first request is still running gets 409, that a retry after
+IDEMPOTENCY_LEASE takes over a request whose worker died, and that a 5xx
+response or an exception releases the key so the retry runs for real.
+
+Never touches DATABASE_URL: it uses a temporary SQLite database.
+(Not a pytest module: the checks only run when the script is run directly.)
+Usage: python scripts/test_idempotency.py
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEMP_DB = None
+if __name__ == '__main__':
+    TEMP_DB = os.path.join(tempfile.mkdtemp(), 'idempotency.db')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + TEMP_DB
+
+from flask import jsonify
+from werkzeug.security import generate_password_hash
+
+from app import app, db, Owner, User, Room, Reservation, IdempotencyKey, idempotent
+
+calls = {'flaky': 0, 'slow': 0}
+nested = {}
+
+
+def flaky():
+    """Raise on the first call, answer 503 on the second and 201 afterwards."""
+    calls['flaky'] += 1
+    if calls['flaky'] == 1:
+        raise RuntimeError('worker blew up')
+    if calls['flaky'] == 2:
+        return jsonify({'success': False}), 503
+    return jsonify({'success': True, 'call': calls['flaky']}), 201
+
+
+def slow():
+    """Retry the same key from a second client while this request is still running."""
+    calls['slow'] += 1
+    if calls['slow'] == 1:
+        nested['status'] = logged_in_client(nested['user_id']).post(
+            '/_test/slow', headers={'Idempotency-Key': 'slow'}).status_code
+    return jsonify({'success': True, 'call': calls['slow']})
+
+
+def add_test_views():
+    app.add_url_rule('/_test/flaky', view_func=idempotent(flaky), methods=['POST'])
+    app.add_url_rule('/_test/slow', view_func=idempotent(slow), methods=['POST'])
+
+
+def logged_in_client(user_id):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_id
+    return client
+
+
+def create_fixture():
+    owner = Owner(username='idem_owner', password=generate_password_hash('idem'),
+                  name='Idempotency Owner', resort_name='Idempotency Resort')
+    user = User(username='idem_user', password=generate_password_hash('idem'), name='Idempotency User')
+    db.session.add_all([owner, user])
+    db.session.flush()
+    room = Room(owner_id=owner.id, name='Idempotency Room', price='1000', capacity='2', status='approved')
+    db.session.add(room)
+    db.session.commit()
+    return owner.id, user.id, room.id
+
+
+def check_idempotency():
+    add_test_views()
+    app.config['PROPAGATE_EXCEPTIONS'] = False
+    app.logger.disabled = True  # the flaky view's traceback is expected
+    with app.app_context():
+        owner_id, user_id, room_id = create_fixture()
+    nested['user_id'] = user_id
+    client = logged_in_client(user_id)
+    check_in = datetime.utcnow().date() + timedelta(days=30)
+    body = {'resource_type': 'room', 'resource_id': room_id, 'owner_id': owner_id,
+            'check_in': check_in.isoformat(), 'check_out': (check_in + timedelta(days=2)).isoformat(),
+            'guests': '2'}
+    headers = {'Idempotency-Key': 'reserve-1'}
+    failures = []
+
+    def check(ok, label):
+        print(f"{'✓' if ok else '✗'} {label}")
+        if not ok:
+            failures.append(label)
+
+    print("Testing Idempotency-Key handling")
+    print("=" * 50)
+
+    first = client.post('/api/reserve', json=body, headers=headers)
+    retry = client.post('/api/reserve', json=body, headers=headers)
+    with app.app_context():
+        reservations = Reservation.query.filter_by(resource_type='room', resource_id=room_id).count()
+    check(first.status_code == 200 and first.get_json()['success'], "first request reserves the room")
+    check(retry.status_code == 200 and retry.data == first.data
+          and retry.headers.get('Idempotent-Replayed') == 'true', "retry replays the stored response")
+    check(reservations == 1, "retry creates no second reservation")
+
+    changed = client.post('/api/reserve', json=dict(body, guests='3'), headers=headers)
+    check(changed.status_code == 422, "same key with a different body gets 422")
+
+    resp = client.post('/_test/slow', headers={'Idempotency-Key': 'slow'})
+    check(resp.status_code == 200 and nested.get('status') == 409 and calls['slow'] == 1,
+          "retry while the first request is running gets 409")
+
+    # a worker killed mid-request leaves its claim without a response
+    with app.app_context():
+        IdempotencyKey.query.update({'status_code': None, 'body': None, 'claimed_at': datetime.utcnow()})
+        db.session.commit()
+    resp = client.post('/_test/slow', headers={'Idempotency-Key': 'slow'})
+    check(resp.status_code == 409 and calls['slow'] == 1, "unfinished claim within the lease gets 409")
+    with app.app_context():
+        IdempotencyKey.query.update({'claimed_at': datetime.utcnow() - timedelta(
+            seconds=app.config['IDEMPOTENCY_LEASE'] + 1)})
+        db.session.commit()
+    resp = client.post('/_test/slow', headers={'Idempotency-Key': 'slow'})
+    check(resp.status_code == 200 and calls['slow'] == 2 and not resp.headers.get('Idempotent-Replayed'),
+          "retry after the lease takes over and runs the view")
+    resp = client.post('/_test/slow', headers={'Idempotency-Key': 'slow'})
+    check(resp.headers.get('Idempotent-Replayed') == 'true' and resp.get_json()['call'] == 2,
+          "the takeover's response is replayed afterwards")
+
+    statuses = [client.post('/_test/flaky', headers={'Idempotency-Key': 'flaky'}).status_code
+                for _ in range(4)]
+    check(statuses == [500, 503, 201, 201] and calls['flaky'] == 3,
+          "exception and 5xx release the key; the success is replayed")
+
+    print("=" * 50)
+    with app.app_context():
+        db.engine.dispose()
+    os.remove(TEMP_DB)
+    if failures:
+        print(f"{len(failures)} check(s) failed")
+        return 1
+    print("Test completed successfully!")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(check_idempotency())
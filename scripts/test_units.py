@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test script for rooms/cottages listed with several identical units.
+
+On a room with 2 units it checks that a third overlapping confirmation is
+refused, that a cart asking for the last free unit twice is refused as a
+whole, that the units cannot be lowered below what upcoming stays hold,
+that the calendar lists only the days with every unit held, and that the
+availability index verifies clean after a rebuild.
+
+Never touches DATABASE_URL: it uses a temporary SQLite database.
+(Not a pytest module: the checks only run when the script is run directly.)
+Usage: python scripts/test_units.py
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEMP_DB = None
+if __name__ == '__main__':
+    TEMP_DB = os.path.join(tempfile.mkdtemp(), 'units.db')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + TEMP_DB
+    os.environ['PAGE_CACHE_BACKEND'] = 'none'
+
+from werkzeug.security import generate_password_hash
+
+from app import (app, db, Owner, User, Room, Reservation, stay_days, confirm_reservation,
+                 rebuild_occupancy_index, verify_occupancy_index)
+
+UNITS = 2
+
+
+def create_fixture():
+    owner = Owner(username='units_owner', password=generate_password_hash('units'),
+                  name='Units Owner', resort_name='Units Resort')
+    user = User(username='units_user', password=generate_password_hash('units'), name='Units User')
+    db.session.add_all([owner, user])
+    db.session.flush()
+    room = Room(owner_id=owner.id, name='Units Room', price='1000', capacity='2', status='approved',
+                units=UNITS)
+    db.session.add(room)
+    db.session.commit()
+    return owner.id, user.id, room.id
+
+
+def add_pending(owner_id, user_id, room_id, check_in, nights):
+    now = datetime.utcnow()
+    r = Reservation(user_id=user_id, owner_id=owner_id, resource_type='room', resource_id=room_id,
+                    check_in=check_in, check_out=check_in + timedelta(days=nights), guests='2',
+                    status='pending', created_at=now, expires_at=now + timedelta(hours=24))
+    db.session.add(r)
+    db.session.commit()
+    return r
+
+
+def logged_in_client(**identity):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess.update(identity)
+    return client
+
+
+def check_units():
+    failures = []
+
+    def check(ok, label):
+        print(f"{'✓' if ok else '✗'} {label}")
+        if not ok:
+            failures.append(label)
+
+    print(f"Testing a room with {UNITS} units")
+    print("=" * 50)
+    start = datetime.utcnow().date() + timedelta(days=60)
+    with app.app_context():
+        owner_id, user_id, room_id = create_fixture()
+
+        # N+1 overlapping confirmations against N units
+        stays = [add_pending(owner_id, user_id, room_id, start, 2) for _ in range(UNITS + 1)]
+        outcomes = [confirm_reservation(r) for r in stays]
+        check(outcomes == ['confirmed'] * UNITS + ['conflict'],
+              f"{UNITS + 1} overlapping confirmations: {UNITS} confirmed, the last conflicts")
+
+        # one unit stays free on a later stay
+        later = start + timedelta(days=5)
+        check(confirm_reservation(add_pending(owner_id, user_id, room_id, later, 1)) == 'confirmed',
+              "a later stay holding one unit is confirmed")
+        pending_before = Reservation.query.filter_by(status='pending').count()
+
+    item = {'resource_type': 'room', 'resource_id': room_id, 'owner_id': owner_id,
+            'check_in': later.isoformat(), 'check_out': (later + timedelta(days=1)).isoformat(),
+            'guests': '2'}
+    resp = logged_in_client(user_id=user_id).post('/api/reserve/cart', json={'items': [item, item]})
+    with app.app_context():
+        pending_after = Reservation.query.filter_by(status='pending').count()
+    check(resp.status_code == 409 and resp.get_json().get('conflicts') == [1]
+          and pending_after == pending_before,
+          "a cart claiming the last unit twice is refused and reserves nothing")
+
+    owner_client = logged_in_client(owner_id=owner_id)
+    owner_client.post(f'/owner/rooms/edit/{room_id}', data={'units': str(UNITS - 1)})
+    with app.app_context():
+        units = db.session.get(Room, room_id).units
+    check(units == UNITS, "units are not lowered below what upcoming stays hold")
+    owner_client.post(f'/owner/rooms/edit/{room_id}', data={'units': str(UNITS + 1)})
+    with app.app_context():
+        units = db.session.get(Room, room_id).units
+    check(units == UNITS + 1, "units can be raised")
+    owner_client.post(f'/owner/rooms/edit/{room_id}', data={'units': str(UNITS)})
+    with app.app_context():
+        units = db.session.get(Room, room_id).units
+    check(units == UNITS, "units can be lowered back to what upcoming stays hold")
+
+    resp = app.test_client().get('/api/confirmed_reservations', query_string={
+        'owner_id': owner_id, 'resource_type': 'room', 'resource_id': room_id,
+        'from': f'{start:%Y-%m}', 'to': f'{later:%Y-%m}'})
+    expected = [day.isoformat() for day in stay_days(start, start + timedelta(days=2))]
+    check(resp.get_json().get('dates') == expected,
+          "the calendar lists only the days with every unit held")
+
+    with app.app_context():
+        reservations, days, conflicts = rebuild_occupancy_index()
+        missing, stale, conflicting = verify_occupancy_index()
+        check(reservations == UNITS + 1 and conflicts == 0 and not (missing or stale or conflicting),
+              "the availability index verifies clean after a rebuild")
+        db.engine.dispose()
+
+    print("=" * 50)
+    os.remove(TEMP_DB)
+    if failures:
+        print(f"{len(failures)} check(s) failed")
+        return 1
+    print("Test completed successfully!")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(check_units())
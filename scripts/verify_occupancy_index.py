@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Check the resource_occupancy availability index against confirmed reservations.
+Lists days missing from the index, stale index rows, and days overbooked by
+more confirmed reservations than the room/cottage has units. Exits non-zero when the index is out of
+sync; fix it with scripts/rebuild_occupancy_index.py.
+Usage: python scripts/verify_occupancy_index.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, verify_occupancy_index
+
+MAX_LISTED = 20
+
+
+def _print_rows(label, rows):
+    print(f"! {len(rows)} {label}")
+    for resource_type, resource_id, day, reservation_id in rows[:MAX_LISTED]:
+        print(f"  {resource_type} #{resource_id} on {day.isoformat()} (reservation #{reservation_id})")
+    if len(rows) > MAX_LISTED:
+        print(f"  ... and {len(rows) - MAX_LISTED} more")
+
+
+def verify():
+    with app.app_context():
+        missing, stale, conflicts = verify_occupancy_index()
+        if missing:
+            _print_rows("day(s) missing from the index", missing)
+        if stale:
+            _print_rows("stale index row(s)", stale)
+        if conflicts:
+            _print_rows("day(s) held by more confirmed reservations than the resource has units",
+                        [key + (reservation_id,) for key, reservation_id in conflicts])
+        if missing or stale:
+            return 1
+        print("✓ Availability index matches confirmed reservations")
+        return 0
+
+
+if __name__ == '__main__':
+    sys.exit(verify())